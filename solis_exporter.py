@@ -3,12 +3,17 @@ from prometheus_client import CollectorRegistry, generate_latest
 from prometheus_client.exposition import start_wsgi_server
 from wsgiref.simple_server import make_server
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import re
+import time
+import zlib
 
 # Exporter Port
 PORT = 8686
 
+# Seconds to reuse the last exposition for repeated scrapes (0 disables)
+CACHE_SECONDS = 5
+
 # Device Configuration
 IP = "INVERTER_IP"
 USERNAME = "INVERTER_USERNAME"
@@ -16,25 +21,31 @@ PASSWORD = "INVERTER_PASSWORD"
 
 SOLIS_ADDRESS = f"http://{IP}/status.html"
 
+SESSION = requests.Session()
+SESSION.auth = (USERNAME, PASSWORD)
+SESSION.trust_env = False
+SESSION.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'})
+SESSION.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+
+VAR_RE = re.compile(rb'\bvar\s+(webdata_now_p|webdata_today_e|webdata_total_e)\s*=\s*"([^"]*)"')
+
 registry = CollectorRegistry()
 inverter_power = Gauge('inverter_power', 'Power output of the inverter', registry=registry)
 inverter_energy_today = Gauge('inverter_energy_today', 'Energy produced today by the inverter', registry=registry)
 inverter_energy_total = Gauge('inverter_energy_total', 'Total energy produced by the inverter', registry=registry)
 
+last_exposition = None
+
 def fetch_data():
     while True:
         try:
-            response = requests.get(SOLIS_ADDRESS, auth=(USERNAME, PASSWORD), timeout=10)
+            response = SESSION.get(SOLIS_ADDRESS, timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                script = soup.find_all('script')[1].string
-                def extract_value(name):
-                    match = re.search(f'var {name} = "(.*?)";', script)
-                    return float(match.group(1).strip()) if match else 0
+                values = dict(VAR_RE.findall(response.content))
 
-                inverter_power.set(extract_value('webdata_now_p'))
-                inverter_energy_today.set(extract_value('webdata_today_e'))
-                inverter_energy_total.set(extract_value('webdata_total_e'))
+                inverter_power.set(float(values.get(b'webdata_now_p', 0)))
+                inverter_energy_today.set(float(values.get(b'webdata_today_e', 0)))
+                inverter_energy_total.set(float(values.get(b'webdata_total_e', 0)))
                 break
             else:
                 print(f"Failed to fetch data. Status code: {response.status_code}")
@@ -46,11 +57,21 @@ def fetch_data():
 
     print("Data fetched successfully.")
 def metrics_app(environ, start_response):
+    global last_exposition
     if environ['PATH_INFO'] == '/metrics':
-        fetch_data()
-        data = generate_latest(registry)
-        status = '200 OK'
-        headers = [('Content-type', CONTENT_TYPE_LATEST)]
+        now = time.monotonic()
+        if last_exposition is None or now - last_exposition[0] >= CACHE_SECONDS:
+            fetch_data()
+            last_exposition = (now, generate_latest(registry))
+        data = last_exposition[1]
+        etag = f'"{zlib.crc32(data):08x}"'
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            status = '304 Not Modified'
+            headers = [('ETag', etag)]
+            data = b''
+        else:
+            status = '200 OK'
+            headers = [('Content-type', CONTENT_TYPE_LATEST), ('ETag', etag)]
     else:
         status = '404 Not Found'
         headers = [('Content-type', 'text/plain')]